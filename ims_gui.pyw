@@ -505,3 +505,4 @@ class Application(tk.Tk):
 if __name__ == "__main__":
     app = Application()
     app.mainloop()
+    app.inventory_management.close()
@@ -1,22 +1,49 @@
 import sqlite3
+import threading
+import queue
+from collections import OrderedDict
+from contextlib import contextmanager
 import qrcode
+from qrcode.constants import ERROR_CORRECT_L
 import csv
+import errno
 import os
 import shutil
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side
+import xlsxwriter
 
-class InventoryManagement:
-    def __init__(self):
-        """Initializes the InventoryManagement class and creates the database."""
-        self.create_database()
+DATABASE_PATH = 'inventory_database.db'
 
-    def create_database(self):
-        """Creates the SQLite database and the products table if it doesn't exist."""
-        conn = sqlite3.connect('inventory_database.db')
-        cursor = conn.cursor()
-        cursor.execute('''
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-64000',
+    'PRAGMA busy_timeout=5000',
+)
+
+# Number of read-only connections used for lookups alongside the single writer connection.
+READ_CONNECTIONS = 4
+
+# Working directories created on startup.
+DIRECTORIES = ('./Invoices', './QRCodes', './IncomingGoods/Processed', './OutgoingGoods/Processed')
+
+# Maximum number of products kept in the get_product lookup cache.
+PRODUCT_CACHE_SIZE = 1024
+
+# Cell formats shared by all invoice workbooks (registered once per workbook).
+INVOICE_HEADER_FORMAT = {'bold': True, 'align': 'center', 'bottom': 1}
+INVOICE_CURRENCY_FORMAT = {'num_format': '#,##0.00 €'}
+INVOICE_TOTAL_FORMAT = {**INVOICE_CURRENCY_FORMAT, 'bold': True}
+
+# Maximum number of invoice lines per Excel file; larger invoices are split into parts.
+INVOICE_ROWS_PER_FILE = 250000
+
+class SQL:
+    # Statements used by InventoryManagement, kept as constants so every call
+    # passes the identical string to sqlite3's prepared statement cache.
+    CREATE_PRODUCTS_TABLE = '''
         CREATE TABLE IF NOT EXISTS products (
             id INTEGER PRIMARY KEY,
             product_name TEXT NOT NULL,
@@ -24,19 +51,208 @@ class InventoryManagement:
             price REAL NOT NULL,
             description TEXT
         )
-        ''')
-        conn.commit()
-        conn.close()
+    '''
 
-    def connect_db(self):
-        """Establishes a connection to the SQLite database.
+    CREATE_NAME_INDEX = '''
+        CREATE INDEX IF NOT EXISTS idx_products_name ON products (product_name COLLATE NOCASE)
+    '''
 
-        Returns:
-            tuple: A tuple containing the connection and cursor objects.
+    INSERT_PRODUCT_WITH_ID = '''
+        INSERT INTO products (id, product_name, quantity, price, description)
+        VALUES (?, ?, ?, ?, ?)
+    '''
+
+    INSERT_PRODUCT = '''
+        INSERT INTO products (product_name, quantity, price, description)
+        VALUES (?, ?, ?, ?)
+    '''
+
+    ADD_STOCK = '''
+        UPDATE products
+        SET quantity = quantity + ?
+        WHERE id = ?
+    '''
+
+    REMOVE_STOCK = '''
+        UPDATE products
+        SET quantity = quantity - ?
+        WHERE id = ? AND quantity >= ?
+        RETURNING quantity
+    '''
+
+    PRODUCT_EXISTS = '''
+        SELECT 1 FROM products WHERE id = ?
+    '''
+
+    UPDATE_QUANTITY = '''
+        UPDATE products
+        SET quantity = ?
+        WHERE id = ?
+    '''
+
+    UPDATE_PRODUCT = '''
+        UPDATE products
+        SET product_name = ?, quantity = ?, price = ?, description = ?
+        WHERE id = ?
+    '''
+
+    DELETE_PRODUCT = '''
+        DELETE FROM products WHERE id = ?
+    '''
+
+    GET_PRODUCT = '''
+        SELECT id, product_name, quantity, price, description FROM products WHERE id = ?
+    '''
+
+    SEARCH_PRODUCTS_BY_NAME = '''
+        SELECT id, product_name, quantity, price, description FROM products WHERE product_name LIKE ?
+    '''
+
+    SEARCH_PRODUCTS_BY_PREFIX = '''
+        SELECT id, product_name, quantity, price, description FROM products WHERE product_name LIKE ? ESCAPE '\\'
+    '''
+
+    LIST_PRODUCTS = '''
+        SELECT id, product_name, quantity, price, description FROM products
+    '''
+
+    REMOVE_OUTGOING_STOCK = '''
+        UPDATE products
+        SET quantity = MAX(0, quantity - ?)
+        WHERE id = ?
+    '''
+
+    UPSERT_INCOMING_STOCK = '''
+        INSERT INTO products (id, product_name, quantity, price, description)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET quantity = quantity + excluded.quantity
+    '''
+
+def render_qr_code(item):
+    """Renders a compact QR code for batch generation and saves it as a PNG image.
+
+    Uses low error correction and small modules to keep bulk rendering cheap; single codes
+    shown in the GUI are generated with the qrcode defaults instead.
+
+    Args:
+        item (tuple): A tuple of the data to be encoded and the ID of the product.
+    """
+    product_data, product_id = item
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECT_L, box_size=4, border=2)
+    qr.add_data(product_data)
+    qr.make(fit=True)
+    qr.make_image().save(f"./QRCodes/qr_code_{product_id}.png")
+
+class InventoryManagement:
+    def __init__(self):
+        """Initializes the InventoryManagement class, creates the working directories,
+        opens the read-write and read-only database connections and creates the database."""
+        self.conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False, isolation_level=None, cached_statements=256)
+        self.cursor = self.conn.cursor()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.product_cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.cache_generation = 0
+        for directory in DIRECTORIES:
+            pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+        self.configure_connection(self.conn)
+        self.create_database()
+
+        # Readers use their own connections so they never wait on the writer lock (WAL mode)
+        read_uri = pathlib.Path(DATABASE_PATH).resolve().as_uri() + '?mode=ro'
+        self.read_connections = queue.Queue()
+        for _ in range(READ_CONNECTIONS):
+            read_conn = sqlite3.connect(read_uri, uri=True, check_same_thread=False, cached_statements=256)
+            self.configure_connection(read_conn)
+            self.read_connections.put(read_conn)
+
+    def configure_connection(self, conn):
+        """Applies the per-connection runtime PRAGMAs to a database connection.
+
+        Args:
+            conn (sqlite3.Connection): The connection to configure.
+        """
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+
+    def create_database(self):
+        """Creates the SQLite database and the products table if it doesn't exist.
+
+        The database is switched to WAL journal mode, which is persistent in the database file.
+        """
+        with self.lock:
+            self.cursor.execute('PRAGMA journal_mode=WAL')
+            self.cursor.execute(SQL.CREATE_PRODUCTS_TABLE)
+            self.cursor.execute(SQL.CREATE_NAME_INDEX)
+
+    def close(self):
+        """Closes the read-only and read-write database connections.
+
+        The read-only connections are closed first so that closing the read-write connection,
+        as the last one, checkpoints the WAL into the database file. Calling close again does nothing.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            for _ in range(READ_CONNECTIONS):
+                self.read_connections.get().close()
+            self.cursor.close()
+            self.conn.close()
+
+    @contextmanager
+    def write_access(self, product_ids=()):
+        """Holds the writer lock for a write and drops the written products from the lookup cache.
+
+        Writes are made on self.cursor while the context is held.
+
+        Args:
+            product_ids (iterable, optional): IDs of the products changed by the write.
+        """
+        with self.lock:
+            try:
+                yield
+            finally:
+                self.invalidate_products(product_ids)
+
+    @contextmanager
+    def read_access(self):
+        """Borrows a read-only connection from the pool.
+
+        Yields:
+            sqlite3.Connection: A read-only database connection.
+        """
+        conn = self.read_connections.get()
+        try:
+            yield conn
+        finally:
+            self.read_connections.put(conn)
+
+    def invalidate_products(self, product_ids):
+        """Removes products from the get_product lookup cache.
+
+        Args:
+            product_ids (iterable): IDs of the products to remove.
+        """
+        with self.cache_lock:
+            for product_id in product_ids:
+                self.product_cache.pop(product_id, None)
+            self.cache_generation += 1
+
+    def execute_in_transaction(self, sql, params):
+        """Executes a statement for many parameter sets in a single write transaction.
+
+        Either every parameter set is applied or, on error, none is. The caller must hold write access.
+
+        Args:
+            sql (str): The SQL statement to execute.
+            params (list): A list of parameter tuples for the statement.
         """
-        conn = sqlite3.connect('inventory_database.db')
-        cursor = conn.cursor()
-        return conn, cursor
+        # The connection context manager commits the transaction, or rolls it back on error
+        with self.conn:
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self.cursor.executemany(sql, params)
 
     def add_product(self, product_name, quantity, price, description, product_id=None):
         """Adds a new product to the database.
@@ -48,19 +264,11 @@ class InventoryManagement:
             description (str): Description of the product.
             product_id (int, optional): ID of the product; if provided, inserts with this ID.
         """
-        conn, cursor = self.connect_db()
-        if product_id:
-            cursor.execute('''
-            INSERT INTO products (id, product_name, quantity, price, description)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (product_id, product_name, quantity, price, description))
-        else:
-            cursor.execute('''
-            INSERT INTO products (product_name, quantity, price, description)
-            VALUES (?, ?, ?, ?)
-            ''', (product_name, quantity, price, description))
-        conn.commit()
-        conn.close()
+        with self.write_access((product_id,)):
+            if product_id:
+                self.cursor.execute(SQL.INSERT_PRODUCT_WITH_ID, (product_id, product_name, quantity, price, description))
+            else:
+                self.cursor.execute(SQL.INSERT_PRODUCT, (product_name, quantity, price, description))
 
     def add_stock(self, product_id, quantity):
         """Adds stock to an existing product in the inventory.
@@ -75,14 +283,8 @@ class InventoryManagement:
         if quantity < 0:
             raise ValueError("Quantity to add must be non-negative.")
 
-        conn, cursor = self.connect_db()
-        cursor.execute('''
-            UPDATE products 
-            SET quantity = quantity + ? 
-            WHERE id = ? 
-        ''', (quantity, product_id))
-        conn.commit()
-        conn.close()
+        with self.write_access((product_id,)):
+            self.cursor.execute(SQL.ADD_STOCK, (quantity, product_id))
     
     def remove_stock(self, product_id, quantity):
         """Removes stock from an existing product in the inventory.
@@ -97,27 +299,15 @@ class InventoryManagement:
         if quantity < 0:
             raise ValueError("Quantity to remove must be non-negative.")
 
-        conn, cursor = self.connect_db()
-        cursor.execute('''
-            SELECT quantity FROM products WHERE id = ? 
-        ''', (product_id,))
-        current_quantity = cursor.fetchone()
+        with self.write_access((product_id,)):
+            self.cursor.execute(SQL.REMOVE_STOCK, (quantity, product_id, quantity))
+            updated = self.cursor.fetchall()
 
-        if current_quantity is None:
-            raise ValueError("Product ID not found.")
-
-        current_quantity = current_quantity[0]
-
-        if quantity > current_quantity:
-            raise ValueError("Cannot remove more than available quantity.")
-        
-        cursor.execute('''
-            UPDATE products 
-            SET quantity = quantity - ? 
-            WHERE id = ? 
-        ''', (quantity, product_id))
-        conn.commit()
-        conn.close()
+            if not updated:
+                self.cursor.execute(SQL.PRODUCT_EXISTS, (product_id,))
+                if self.cursor.fetchone() is None:
+                    raise ValueError("Product ID not found.")
+                raise ValueError("Cannot remove more than available quantity.")
 
     def update_quantity(self, product_id, new_quantity):
         """Updates the quantity of a specific product.
@@ -126,14 +316,8 @@ class InventoryManagement:
             product_id (int): ID of the product.
             new_quantity (int): New quantity for the product.
         """
-        conn, cursor = self.connect_db()
-        cursor.execute('''
-        UPDATE products
-        SET quantity = ?
-        WHERE id = ?
-        ''', (new_quantity, product_id))
-        conn.commit()
-        conn.close()
+        with self.write_access((product_id,)):
+            self.cursor.execute(SQL.UPDATE_QUANTITY, (new_quantity, product_id))
 
     def update_product(self, product_id, product_name, quantity, price, description):
         """Updates the details of an existing product.
@@ -145,14 +329,8 @@ class InventoryManagement:
             price (float): New price of the product.
             description (str): New description of the product.
         """
-        conn, cursor = self.connect_db()
-        cursor.execute('''
-        UPDATE products
-        SET product_name = ?, quantity = ?, price = ?, description = ?
-        WHERE id = ?
-        ''', (product_name, quantity, price, description, product_id))
-        conn.commit()
-        conn.close()
+        with self.write_access((product_id,)):
+            self.cursor.execute(SQL.UPDATE_PRODUCT, (product_name, quantity, price, description, product_id))
 
     def delete_product(self, product_id):
         """Deletes a product from the inventory.
@@ -160,12 +338,8 @@ class InventoryManagement:
         Args:
             product_id (int): ID of the product to be deleted.
         """
-        conn, cursor = self.connect_db()
-        cursor.execute('''
-        DELETE FROM products WHERE id = ?
-        ''', (product_id,))
-        conn.commit()
-        conn.close()
+        with self.write_access((product_id,)):
+            self.cursor.execute(SQL.DELETE_PRODUCT, (product_id,))
 
     def get_product(self, product_id):
         """Retrieves the details of a specific product.
@@ -176,12 +350,23 @@ class InventoryManagement:
         Returns:
             tuple: A tuple containing product details, or None if not found.
         """
-        conn, cursor = self.connect_db()
-        cursor.execute('''
-        SELECT * FROM products WHERE id = ?
-        ''', (product_id,))
-        product = cursor.fetchone()
-        conn.close()
+        with self.cache_lock:
+            product = self.product_cache.get(product_id)
+            if product is not None:
+                self.product_cache.move_to_end(product_id)
+                return product
+            generation = self.cache_generation
+
+        with self.read_access() as conn:
+            product = conn.execute(SQL.GET_PRODUCT, (product_id,)).fetchone()
+
+        # Only cache the row if no write has invalidated the cache since the lookup started
+        if product is not None:
+            with self.cache_lock:
+                if generation == self.cache_generation:
+                    self.product_cache[product_id] = product
+                    if len(self.product_cache) > PRODUCT_CACHE_SIZE:
+                        self.product_cache.popitem(last=False)
         return product
 
     def search_products_by_name(self, name):
@@ -193,12 +378,24 @@ class InventoryManagement:
         Returns:
             list: A list of tuples containing products that match the search criteria.
         """
-        conn, cursor = self.connect_db()
-        cursor.execute('''
-        SELECT * FROM products WHERE product_name LIKE ?
-        ''', (f'%{name}%',))
-        products = cursor.fetchall()
-        conn.close()
+        with self.read_access() as conn:
+            products = conn.execute(SQL.SEARCH_PRODUCTS_BY_NAME, (f'%{name}%',)).fetchall()
+        return products
+
+    def search_products_by_prefix(self, prefix):
+        """Searches for products whose name starts with the given prefix (case-insensitive).
+
+        Unlike search_products_by_name, this lookup can use the product name index.
+
+        Args:
+            prefix (str): Beginning of the product name to search for.
+
+        Returns:
+            list: A list of tuples containing products that match the search criteria.
+        """
+        pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        with self.read_access() as conn:
+            products = conn.execute(SQL.SEARCH_PRODUCTS_BY_PREFIX, (pattern,)).fetchall()
         return products
 
     def list_products(self):
@@ -207,12 +404,8 @@ class InventoryManagement:
         Returns:
             list: A list of tuples containing all products in the inventory.
         """
-        conn, cursor = self.connect_db()
-        cursor.execute('''
-        SELECT * FROM products
-        ''')
-        products = cursor.fetchall()
-        conn.close()
+        with self.read_access() as conn:
+            products = conn.execute(SQL.LIST_PRODUCTS).fetchall()
         return products
 
     def generate_qr_code(self, product_data, product_id):
@@ -225,104 +418,181 @@ class InventoryManagement:
         img = qrcode.make(product_data)
         img.save(f"./QRCodes/qr_code_{product_id}.png", "PNG")
 
-    def process_outgoing_goods(self, filename):
-        """Processes outgoing goods from a CSV file.
+    def generate_qr_codes_batch(self, items):
+        """Generates QR codes for many products in parallel worker processes.
 
         Args:
-            filename (str): Path to the CSV file containing outgoing goods data.
+            items (iterable): Tuples of the data to be encoded and the ID of the product.
+        """
+        with ProcessPoolExecutor() as executor:
+            list(executor.map(render_qr_code, items, chunksize=32))
+
+    def processed_path(self, filename, directory):
+        """Returns the path a goods file is moved to once it has been processed.
+
+        Args:
+            filename (str): Path to the goods file.
+            directory (str): Directory for processed goods files.
+
+        Returns:
+            str: The destination path of the file.
+
+        Raises:
+            FileExistsError: If a processed file with the same name already exists.
         """
-        conn, cursor = self.connect_db()
-        invoice_data = []
+        destination = os.path.join(directory, os.path.basename(filename))
+        if os.path.exists(destination):
+            raise FileExistsError(f"Processed file {destination} already exists.")
+        return destination
 
+    def move_file(self, source, destination):
+        """Moves a file, falling back to a copy when source and destination are on different devices.
+
+        Args:
+            source (str): Path of the file to move.
+            destination (str): Path to move the file to.
+        """
+        try:
+            os.replace(source, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(source, destination)
+
+    def read_goods_rows(self, filename):
+        """Reads the code content and quantity of every row in a goods CSV file.
+
+        An empty file yields no rows. Missing trailing values are returned as None.
+
+        Args:
+            filename (str): Path to the CSV file.
+
+        Yields:
+            tuple: The CODECONTENT and QUANTITY values of a row.
+
+        Raises:
+            ValueError: If the header lacks the CODECONTENT or QUANTITY column.
+        """
         with open(filename, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
+            reader = csv.reader(csvfile)
+            header = next(reader, None)
+            if header is None:
+                return
+
+            missing_columns = [column for column in ('CODECONTENT', 'QUANTITY') if column not in header]
+            if missing_columns:
+                raise ValueError(f"Goods file {filename} is missing column(s): {', '.join(missing_columns)}")
+
+            code_index = header.index('CODECONTENT')
+            quantity_index = header.index('QUANTITY')
             for row in reader:
-                product_data = row.get('CODECONTENT', None)
-                product_quantity = int(row.get('QUANTITY', None))
-                if product_data:
-                    product_info = product_data.split(', ')
-                    product_id = int(product_info[0])
-                    product_name = product_info[1]
-                    product_price = float(product_info[2])
-                    cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-                    existing_product = cursor.fetchone()
-
-                    if existing_product:
-                        new_quantity = existing_product[2] - product_quantity
-                        new_quantity = max(new_quantity, 0)
-                        cursor.execute('UPDATE products SET quantity = ? WHERE id = ?', (new_quantity, product_id))
-
-                    # Add to invoice data
-                    existing_invoice_item = next((item for item in invoice_data if item['Product ID'] == product_id), None)
-                    if existing_invoice_item:
-                        existing_invoice_item['Quantity'] += product_quantity
-                        existing_invoice_item['Total Price'] += product_quantity * product_price
-                    else:
-                        invoice_data.append({
-                            'Product ID': product_id,
-                            'Product Name': product_name,
-                            'Quantity': product_quantity,
-                            'Unit Price': product_price,
-                            'Total Price': product_quantity * product_price
-                        })
-
-        shutil.move(filename, "./OutgoingGoods/Processed")
-        conn.commit()
-        conn.close()
-        self.write_invoice(invoice_data, filename)
-
-    def write_invoice(self, invoice_data, filename):
+                if not row:
+                    continue
+                product_data = row[code_index] if code_index < len(row) else None
+                product_quantity = row[quantity_index] if quantity_index < len(row) else None
+                yield product_data, product_quantity
+
+    def process_outgoing_goods(self, filename, rows_per_file=INVOICE_ROWS_PER_FILE):
+        """Processes outgoing goods from a CSV file.
+
+        Args:
+            filename (str): Path to the CSV file containing outgoing goods data.
+            rows_per_file (int, optional): Maximum number of invoice lines per Excel file.
+
+        Raises:
+            ValueError: If rows_per_file is not positive.
+        """
+        if rows_per_file < 1:
+            raise ValueError("Invoice rows per file must be at least 1.")
+
+        processed_path = self.processed_path(filename, "./OutgoingGoods/Processed")
+        invoice = {}
+        stock_updates = []
+
+        for product_data, product_quantity in self.read_goods_rows(filename):
+            product_quantity = int(product_quantity)
+            if product_data:
+                product_info = product_data.split(',', 3)
+                product_id = int(product_info[0])
+                product_name = product_info[1].strip()
+                product_price = float(product_info[2])
+
+                # One stock update per row so MAX(0, ...) clamps after every row, as before
+                stock_updates.append((product_quantity, product_id))
+
+                # Add to invoice data
+                invoice_item = invoice.get(product_id)
+                if invoice_item:
+                    invoice_item['Quantity'] += product_quantity
+                    invoice_item['Total Price'] += product_quantity * product_price
+                else:
+                    invoice[product_id] = {
+                        'Product ID': product_id,
+                        'Product Name': product_name,
+                        'Quantity': product_quantity,
+                        'Unit Price': product_price,
+                        'Total Price': product_quantity * product_price
+                    }
+
+        with self.write_access(invoice):
+            self.execute_in_transaction(SQL.REMOVE_OUTGOING_STOCK, stock_updates)
+
+        self.move_file(filename, processed_path)
+        invoice_lines = list(invoice.values())
+        if len(invoice_lines) <= rows_per_file:
+            self.write_invoice(invoice_lines, filename)
+        else:
+            for part_index, start in enumerate(range(0, len(invoice_lines), rows_per_file), 1):
+                self.write_invoice(invoice_lines[start:start + rows_per_file], filename, part_index)
+
+    def write_invoice(self, invoice_data, filename, part_index=None):
         """Writes an invoice to an Excel file.
 
         Args:
             invoice_data (list): A list of dictionaries containing invoice data.
             filename (str): Original filename of the processed goods.
+            part_index (int, optional): Part number when an invoice is split over several files.
         """
-        invoice_filename = f"Invoice_{os.path.basename(filename).replace('.csv', '')}_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
+        base_name = os.path.basename(filename).replace('.csv', '')
+        if part_index is not None:
+            base_name = f"{base_name}_part{part_index}"
+        invoice_filename = f"Invoice_{base_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
         invoice_path = os.path.join('./Invoices', invoice_filename)
 
-        os.makedirs('./Invoices', exist_ok=True)
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Invoice"
+        wb = xlsxwriter.Workbook(invoice_path, {'constant_memory': True})
+        ws = wb.add_worksheet("Invoice")
 
         # Formatting
-        bold_font = Font(bold=True)
-        center_alignment = Alignment(horizontal='center')
-        border_style = Border(bottom=Side(style='thin'))
+        header_format = wb.add_format(INVOICE_HEADER_FORMAT)
+        currency_format = wb.add_format(INVOICE_CURRENCY_FORMAT)
+        total_format = wb.add_format(INVOICE_TOTAL_FORMAT)
+
+        # Format the price columns as currency before any row is written
+        column_formats = [None, None, None, currency_format, currency_format]
+        ws.set_column(3, 4, None, currency_format)
 
         # Header
         headers = ['Product ID', 'Product Name', 'Quantity', 'Unit Price', 'Total Price']
-        ws.append(headers)
-        for col in range(1, 6):
-            cell = ws.cell(row=1, column=col)
-            cell.font = bold_font
-            cell.alignment = center_alignment
-            cell.border = border_style
+        ws.write_row(0, 0, headers, header_format)
+        widths = [len(header) for header in headers]
 
         # Data
-        for data in invoice_data:
-            ws.append([data['Product ID'], data['Product Name'], data['Quantity'], data['Unit Price'], data['Total Price']])
-
-        # Adjust column width
-        for col in ws.columns:
-            max_length = max([len(str(cell.value)) for cell in col if cell.value])
-            ws.column_dimensions[col[0].column_letter].width = max_length + 2
-
-        # Format as currency
-        for row in ws.iter_rows(min_row=2, max_col=5, max_row=len(invoice_data) + 1):
-            row[3].number_format = '#,##0.00 €'
-            row[4].number_format = '#,##0.00 €'
+        total_sum = 0
+        for row_index, data in enumerate(invoice_data, 1):
+            row = [data['Product ID'], data['Product Name'], data['Quantity'], data['Unit Price'], data['Total Price']]
+            ws.write_row(row_index, 0, row)
+            widths = [max(width, len(str(value))) if value else width for width, value in zip(widths, row)]
+            total_sum += row[4]
 
         # Total sum
-        total_sum = sum(data['Total Price'] for data in invoice_data)
-        ws.append(['', '', '', 'Total Price', total_sum])
-        total_cell = ws.cell(row=ws.max_row, column=5)
-        total_cell.font = bold_font
-        total_cell.number_format = '#,##0.00 €'
+        ws.write_string(len(invoice_data) + 1, 3, 'Total Price')
+        ws.write_number(len(invoice_data) + 1, 4, total_sum, total_format)
 
-        wb.save(invoice_path)
+        # Adjust column width
+        for col, (width, column_format) in enumerate(zip(widths, column_formats)):
+            ws.set_column(col, col, width + 2, column_format)
+
+        wb.close()
 
     def process_incoming_goods(self, filename):
         """Processes incoming goods from a CSV file.
@@ -330,27 +600,23 @@ class InventoryManagement:
         Args:
             filename (str): Path to the CSV file containing incoming goods data.
         """
-        conn, cursor = self.connect_db()
-        with open(filename, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                product_data = row.get('CODECONTENT', None)
-                product_quantity = row.get('QUANTITY', None)
-                if product_data:
-                    product_info = product_data.split(', ')
-                    product_id = int(product_info[0])
-                    cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-                    existing_product = cursor.fetchone()
-
-                    if existing_product:
-                        new_quantity = existing_product[2] + int(product_quantity)
-                        cursor.execute('UPDATE products SET quantity = ? WHERE id = ?', (new_quantity, product_id))
-                    else:
-                        cursor.execute('''
-                        INSERT INTO products (id, product_name, quantity, price, description)
-                        VALUES (?, ?, ?, ?, ?)
-                        ''', (product_id, product_info[1], int(product_quantity), float(product_info[2]), product_info[3]))
-
-        shutil.move(filename, "./IncomingGoods/Processed")
-        conn.commit()
-        conn.close()
+        processed_path = self.processed_path(filename, "./IncomingGoods/Processed")
+        products = {}
+
+        for product_data, product_quantity in self.read_goods_rows(filename):
+            if product_data:
+                product_info = product_data.split(',', 3)
+                product_id = int(product_info[0])
+                product_quantity = int(product_quantity)
+
+                # Sum repeated products so each one is written once
+                product = products.get(product_id)
+                if product:
+                    product[2] += product_quantity
+                else:
+                    products[product_id] = [product_id, product_info[1].strip(), product_quantity, float(product_info[2]), product_info[3].strip()]
+
+        with self.write_access(products):
+            self.execute_in_transaction(SQL.UPSERT_INCOMING_STOCK, list(products.values()))
+
+        self.move_file(filename, processed_path)